@@ -0,0 +1,24 @@
+"""
+app/config.py:
+- Loads config.yaml for the API server (app/server.py) and the Gradio frontend (app/frontend.py),
+  so both read the same paths and settings as the scripts.
+- Parses with libyaml's CSafeLoader when PyYAML was built with it (several times faster than the pure-Python parser).
+"""
+import os
+import yaml
+
+try:
+    from yaml import CSafeLoader as _YamlLoader   # libyaml-backed parser when available
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# config.yaml at the repo root, independent of the working directory
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "config.yaml")
+
+
+def load_config(path=CONFIG_PATH):
+    """Parse config.yaml into a dict; {} when the file does not exist."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return yaml.load(f, Loader=_YamlLoader) or {}
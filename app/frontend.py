@@ -8,28 +8,32 @@
 # were suggested; we reviewed and thoroughly tested the code locally. See coerce_and_clamp_dict() and make_json_safe() below. 
 
 # import necessary helpers 
-import os
-import yaml
-import json
 import math
+import re
+import orjson   # fast JSON encode/decode for the API call
+from collections import deque
+from functools import lru_cache
 import pandas as pd, numpy as np  # table handling 
 import gradio as gr   # UI 
 import requests   # to call API server 
-from typing import Dict, Any, List
-
-# point to config.yaml file to retrieve API URL 
-CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "config.yaml")
-# if config exists - load it 
-if os.path.exists(CONFIG_PATH):
-    with open(CONFIG_PATH, "r") as f:
-        cfg = yaml.safe_load(f)
-# if config does not exist - it falls back to being an empty dict
-else:
-    cfg = {}
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Any, List, Optional, Tuple
+from app.config import load_config
+
+# retrieve API URL from config.yaml (see app/config.py); an empty dict when the file does not exist
+cfg = load_config()
 
 # server endpoint UI will use for POST; if confid is missing fallback to predict_named
 API_URL = cfg.get("api_url", {}).get("FastAPI", "http://127.0.0.1:8000/predict_named")
 
+# one shared HTTP session so repeated submits reuse the keep-alive connection instead of
+# paying a new TCP/TLS handshake each time; connection failures are retried twice with a short backoff
+SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=Retry(total=2, backoff_factor=0.1))
+SESSION.mount("http://", _ADAPTER)
+SESSION.mount("https://", _ADAPTER)
+
 # reduced set of sensible columns exposed in UI to the end user
 INPUT_COLS = [
     "Aroma", "Flavor", "Aftertaste", "Acidity",
@@ -47,73 +51,101 @@ RANGES = {c: (0.0, 10.0) for c in INPUT_COLS}
 # implemented using ChatGPT (conversation 2025-11-23) to help normalize free-form user input into numeric values within range
 # convert user values to allowed 0 - 10 range to avoid errors/crashes: handles blanks, strings, noisy input by stripping chars 
 # and sets None for missing / invalid entries (JSON's null)
+# matches every character that cannot be part of a number (used to turn "7.5pts" into "7.5")
+_STRIP_RE = re.compile(r"[^0-9.\-]")
+
+# coerces a single raw cell (always passed as str so the cache key is hashable) into a clamped float or None;
+# cached because users tend to resubmit the same values
+@lru_cache(maxsize=1024)
+def _coerce_one(col: str, raw: str) -> Optional[float]:
+    # if a value user types is blank - converts it into None
+    if raw.strip() == "":
+        return None
+    # tries to convert to float 
+    try:
+        fv = float(raw)
+    except ValueError:
+        # try to strip out non-digit characters (e.g. "7.5pts" -> "7.5")
+        cleaned = _STRIP_RE.sub("", raw)
+        try:
+            fv = float(cleaned) if cleaned not in ("", ".", "-") else None
+        except ValueError:
+            fv = None
+    # if conversion failed -> None
+    if fv is None or math.isnan(fv) or math.isinf(fv):
+        return None
+    # once we have a clean numeric - it is clamped to be within [0,10] range of valid inputs 
+    # if user typed 13 it will be clmaped to 10
+    # if user typed -2 it will become 0
+    lo, hi = RANGES.get(col, (None, None))
+    if lo is not None and hi is not None:
+        fv = max(lo, min(hi, fv))
+    return float(fv)
+
+# whole-row cache on top of _coerce_one: a resubmitted identical row skips the per-column loop entirely.
+# items is ((col, raw_str), ...) in INPUT_COLS order so it is hashable and independent of dict order
+@lru_cache(maxsize=256)
+def _coerce_tuple(items: Tuple[Tuple[str, str], ...]) -> Tuple[Tuple[str, Optional[float]], ...]:
+    # iterates over 8 input columns; blanks/None become None, "7.5pts" keeps the number
+    return tuple((k, _coerce_one(k, raw)) for k, raw in items)
+
 def coerce_and_clamp_dict(row: Dict[str, Any]) -> Dict[str, Any]:
-    # out = {}
-    out: Dict[str, Any] = {}
-    # iterates over 8 input columns 
+    items = []
     for k in INPUT_COLS:
         v = row.get(k, "")
-        # if a value user types is blank or string - converts it into np.nan
-        # or if user types something like "7.5pts" it strips the letters and keeps the number 
-        if v is None or (isinstance(v, str) and v.strip() == ""):
-            # out[k] = np.nan
-            out[k] = None
-            continue
-        # tries to convert to float 
-        fv = None
-        try:
-            fv = float(v)
-        except Exception:
-            # try to strip out non-digit characters (e.g. "7.5pts" -> "7.5")
-            try:
-                cleaned = "".join(ch for ch in str(v) if (ch.isdigit() or ch in ".-"))
-                fv = float(cleaned) if cleaned not in ("", ".", "-") else None
-            except Exception:
-                fv = None
-        # if conversion failed -> None
-        if fv is None or (isinstance(fv, float) and (math.isnan(fv) or math.isinf(fv))):
-            out[k] = None
-            continue
-        # once we have a clean numeric - it is clamped to be within [0,10] range of valid inputs 
-        # if user typed 13 it will be clmaped to 10
-        # if user typed -2 it will become 0
-        lo, hi = RANGES.get(k, (None, None))
-        if lo is not None and hi is not None:
-            fv = max(lo, min(hi, fv))
-        out[k] = float(fv)
-    # returns a clean dict to be sent to server 
-    return out
-
-# ChatGPT 5.1 used to prototype this recursive JSON-sanitizer 
-# This function recursively walks nested containers (dicts, lists, tuples) and ensures any nested 
-# structure (e.g. {"payload": [{"Aroma": np.nan}]}) becomes JSON-safe everywhere, not just the top level
-def make_json_safe(obj):
-    # dict
-    if isinstance(obj, dict):
-        return {k: make_json_safe(v) for k, v in obj.items()}
-    # list/tuple
-    if isinstance(obj, (list, tuple)):
-        return [make_json_safe(v) for v in obj]
+        items.append((k, "" if v is None else str(v)))
+    # returns a fresh clean dict (callers may mutate it) to be sent to server 
+    return dict(_coerce_tuple(tuple(items)))
+
+# ChatGPT 5.1 used to prototype this JSON-sanitizer (originally recursive, now an explicit-stack walk)
+# scalar half of the sanitizer: numpy scalars -> python scalars, NaN/Inf -> None, unknown objects -> str
+def _json_safe_scalar(obj):
+    # ints, bool, str: ok (most common case, checked first)
+    if isinstance(obj, (int, str)):
+        return obj
     # numpy scalar -> python scalar
-    try:
-        import numpy as _np
-        if isinstance(obj, _np.generic):
-            return make_json_safe(obj.item())
-    except Exception:
-        pass
-    # floats: map NaN/Inf -> None
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+        if isinstance(obj, (int, str)):
+            return obj
+    # floats: map NaN/Inf -> None (NaN is the only value not equal to itself)
     if isinstance(obj, float):
-        if math.isnan(obj) or math.isinf(obj):
+        if obj != obj or obj in (math.inf, -math.inf):
             return None
         return float(obj)
-    # ints, bool, str, None: ok
-    if isinstance(obj, (int, bool, str)) or obj is None:
+    # None: ok
+    if obj is None:
         return obj
     # fallback
     try:
         return str(obj)
     except Exception:
         return None
+
+# This function walks nested containers (dicts, lists, tuples) with an explicit stack instead of recursion
+# and ensures any nested structure (e.g. {"payload": [{"Aroma": np.nan}]}) becomes JSON-safe everywhere, 
+# not just the top level. Each stack frame is (source container, output container being filled).
+def make_json_safe(obj):
+    if not isinstance(obj, (dict, list, tuple)):
+        return _json_safe_scalar(obj)
+    root = {} if isinstance(obj, dict) else [None] * len(obj)
+    stack = deque([(obj, root)])
+    while stack:
+        src, dst = stack.pop()
+        items = src.items() if isinstance(src, dict) else enumerate(src)
+        for k, v in items:
+            # dict
+            if isinstance(v, dict):
+                child = {}
+            # list/tuple -> preallocated list
+            elif isinstance(v, (list, tuple)):
+                child = [None] * len(v)
+            else:
+                dst[k] = _json_safe_scalar(v)
+                continue
+            dst[k] = child
+            stack.append((v, child))
+    return root
     
 
 # ------------------------------------------ END CITED BLOCK ------------------------------------------------
@@ -132,23 +164,30 @@ def _row_is_all_null_or_zero(row: Dict[str, Any]) -> bool:
     return True
 
 # sends JSON to server endpoint, returns a tuple (predictions list, raw resposnse/error)
-def call_api_named(payload_rows: List[Dict[str, Any]]):
+# known_safe=True means rows came out of coerce_and_clamp_dict (only python floats / None),
+# so the extra make_json_safe pass over the payload is skipped
+def call_api_named(payload_rows: List[Dict[str, Any]], known_safe: bool = False):
     # sanitize payload so it's JSON-serializable and uses `null` for missing
-    safe_body = {"rows": make_json_safe(payload_rows)}
+    safe_body = {"rows": payload_rows if known_safe else make_json_safe(payload_rows)}
     try:
-        payload_str = json.dumps(safe_body)
+        # orjson returns bytes and handles numpy scalars / NaN (-> null) natively
+        payload_bytes = orjson.dumps(safe_body, option=orjson.OPT_SERIALIZE_NUMPY)
     except Exception as e:
         return None, f"Serialization error: {e}"
     # tries calling POST to get predictions using requests lib
     headers = {"Content-Type": "application/json"}
     try:
-        response = requests.post(API_URL, data=payload_str, headers=headers, timeout=10)   # timeout at 10 sec to avoid hanging 
+        response = SESSION.post(API_URL, data=payload_bytes, headers=headers, timeout=10)   # timeout at 10 sec to avoid hanging 
         response.raise_for_status()
         # returns prediction list and full raw text response to be used within debug box on SUCCESS (200 OK) 
-        return response.json().get("predictions", []), response.text
+        return orjson.loads(response.content).get("predictions", []), response.text
     except Exception as e:
         return None, f"API error: {e}"   # on error return None 
 
+# pretty-prints the debug dict for the debug box (orjson indents in C; response_raw stays a plain string)
+def _pretty_json(debug: Dict[str, Any]) -> str:
+    return orjson.dumps(debug, option=orjson.OPT_INDENT_2).decode()
+
 #prettifies prediction and debug JSON 
 def predict_from_rows_of_dicts(rows_of_dicts: List[Dict[str, Any]]):
     payload_rows = [coerce_and_clamp_dict(row) for row in rows_of_dicts]
@@ -157,18 +196,19 @@ def predict_from_rows_of_dicts(rows_of_dicts: List[Dict[str, Any]]):
     all_rows_invalid = all(_row_is_all_null_or_zero(r) for r in payload_rows)
     if all_rows_invalid:
         debug = {"payload": payload_rows, "response_raw": "skipped - all values missing or zero"}
-        return "Please enter at least one numeric attribute (non-zero) before submitting.", json.dumps(debug, indent=2)
+        return "Please enter at least one numeric attribute (non-zero) before submitting.", _pretty_json(debug)
     # Otherwise proceed and call API (allowed if at least one row has a non-zero numeric)
-    preds, raw = call_api_named(payload_rows)
+    # rows are already clean floats/None from coerce_and_clamp_dict -> single pass over the payload
+    preds, raw = call_api_named(payload_rows, known_safe=True)
     # building a debug dictionary containing both payload and raw server response
     debug = {"payload": payload_rows, "response_raw": raw}
     # if API fails - return empty prediction and debug JSON for debugging 
     if preds is None:
-        return "", json.dumps(debug, indent=2)
+        return "", _pretty_json(debug)
     # prettifying predictions upon successful call to be user-friendly 
     prettified_pred = [f"Predicted Coffee Quality Points = {round(float(p), 1)}" for p in preds]   # rounding predictions to 1 decimal place (user friendly)
     #returns prettified prediction and debug JSON for debug box 
-    return "\n".join(prettified_pred), json.dumps(debug, indent=2)
+    return "\n".join(prettified_pred), _pretty_json(debug)
 
 
 def predict_from_table(table):
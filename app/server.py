@@ -9,6 +9,7 @@ Endpoints:
 Behaviour:
   - If model or preprocessor are missing, server returns a sensible dummy prediction
   - Loads model & preprocessor once at startup
+  - /predict_named micro-batches concurrent requests into one transform + predict call
 
 CITATION: 
 - OpenAI. (2025). ChatGPT (Version 5.1) [Large language model]. https://chat.openai.com  
@@ -17,33 +18,50 @@ for serving the trained model and preprocessing pipeline (app/server.py).
 
 """
 
-from fastapi import FastAPI, HTTPException   # api framework and exception handling imports 
+import os
+# cap BLAS/OpenMP threads before numpy/sklearn start their thread pools (avoids oversubscription
+# when several uvicorn workers share the CPUs); an explicit OMP_NUM_THREADS still wins
+os.environ.setdefault("OMP_NUM_THREADS", str(min(4, os.cpu_count() or 1)))
+
+from fastapi import FastAPI, HTTPException, Request   # api framework and exception handling imports 
 from pydantic import BaseModel   # import to define and validate JSON request body
 import joblib   # to load joblib object 
+import msgspec   # fast typed JSON decoding for /predict_named
 import numpy as np
-import os, yaml, math
-from typing import List, Dict, Any, Optional   # import for type hints 
-from fastapi import Body
+import asyncio, threading
+from typing import List, Dict, Union   # import for type hints 
+from fastapi.responses import ORJSONResponse   # responses are encoded by orjson (C) instead of stdlib json
 import pandas as pd
+from app.config import load_config
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import StandardScaler
 
-# point to config.yaml so server uses same paths as scripts
-CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "config.yaml")
-if os.path.exists(CONFIG_PATH):
-    with open(CONFIG_PATH, "r") as f:
-        cfg = yaml.safe_load(f)
-else:
-    cfg = {}
+# config.yaml is parsed once at import, so server uses same paths as scripts (see app/config.py)
+cfg = load_config()
 
 # read artifacts paths from config 
 PREPROCESSOR_PATH = cfg.get("artifacts", {}).get("preprocessor", "artifacts/preprocessor.joblib")
 MODEL_PATH = cfg.get("artifacts", {}).get("model", "artifacts/model.joblib")
-EXPECTED_COLS = cfg.get("data", {}).get("input_columns", None)
+# input columns: the preprocessor's feature columns (numeric_cols + categorical_cols), unless
+# data.input_columns overrides them
+_data_cfg = cfg.get("data", {})
+EXPECTED_COLS = _data_cfg.get("input_columns")
 if EXPECTED_COLS is None:
     # is not present EXPECTED_COLS becomes empty
-    EXPECTED_COLS = []
+    EXPECTED_COLS = list(_data_cfg.get("numeric_cols") or []) + list(_data_cfg.get("categorical_cols") or [])
+
+# column -> position lookup used to fill ndarrays straight from named rows
+COL_INDEX = {c: i for i, c in enumerate(EXPECTED_COLS)}
+EXPECTED_SET = frozenset(EXPECTED_COLS)
+
+# micro-batching settings for /predict_named: rows from concurrent requests are collected
+# for up to BATCH_TIMEOUT seconds (or until MAX_BATCH requests are queued) and predicted in one call
+MAX_BATCH = int(cfg.get("server", {}).get("batch_size", 64))
+BATCH_TIMEOUT = float(cfg.get("server", {}).get("batch_timeout_ms", 5)) / 1000.0
 
 # create app object 
-app = FastAPI(title="Coffee Quality - Prediction API")
+app = FastAPI(title="Coffee Quality - Prediction API", default_response_class=ORJSONResponse)
 
 # Dummy input model: either one row or multiple rows
 class SingleRow(BaseModel):
@@ -54,22 +72,57 @@ class MultiRow(BaseModel):
 
 # defines JSON body format expected by /predict_named
 # expected body: { "rows": [ {"Aroma": 7.5, "Flavor": 6.0}, {"Aroma":5.0, "Flavor":7.0} ] }
-class NamedRows(BaseModel):
-    rows: List[Dict[str, Any]]
+# decoded with msgspec straight from the raw request bytes (much cheaper than pydantic on untyped dicts);
+# values must be numbers, booleans (read as 1.0 / 0.0, as pydantic accepted them), strings (categorical columns) or null
+class NamedRowsMsg(msgspec.Struct):
+    rows: List[Dict[str, Union[float, str, bool, None]]]
+
+# msgspec does the validation, so the request body schema for /docs is supplied by hand
+NAMED_ROWS_SCHEMA = msgspec.json.schema_components([NamedRowsMsg])[1]["NamedRowsMsg"]
 
 
 # loaded artifacts global vars (placeholders for now)
 MODEL = None
 PREPROCESSOR = None
 
+# per-thread scratch buffer used by _rows_to_ndarray
+_TLS = threading.local()
+
+# False when PREPROCESSOR can take a plain float ndarray in EXPECTED_COLS order (set in load_artifacts)
+NEEDS_DATAFRAME = True
+
+# queue of (rows, future) items filled by /predict_named and drained by the batcher task
+BATCH_QUEUE = None
+
+# transformers that only do per-column numeric work and happily take a 2-D float array
+NUMERIC_TRANSFORMERS = (SimpleImputer, StandardScaler)
+
+# decides whether a fitted preprocessor needs a named DataFrame: a ColumnTransformer selects its columns by
+# name, while a plain numeric pipeline (SimpleImputer / StandardScaler) fitted on EXPECTED_COLS takes a raw ndarray
+def _needs_dataframe(preprocessor):
+    if isinstance(preprocessor, ColumnTransformer) or hasattr(preprocessor, "transformers_"):
+        return True
+    cols = getattr(preprocessor, "feature_names_in_", None)
+    if not EXPECTED_COLS or (cols is not None and list(cols) != EXPECTED_COLS):
+        return True
+    steps = [step for _, step in getattr(preprocessor, "steps", [(None, preprocessor)])]
+    return not all(isinstance(step, NUMERIC_TRANSFORMERS) for step in steps)
+
 # artifact loading function 
 def load_artifacts():
-    global MODEL, PREPROCESSOR
+    global MODEL, PREPROCESSOR, NEEDS_DATAFRAME
     # check if preprocessor exists 
     if os.path.exists(PREPROCESSOR_PATH):
         try:
             # if preprocessor exists, its obj is loaded 
-            PREPROCESSOR = joblib.load(PREPROCESSOR_PATH)
+            # (lz4-compressed dump, so no mmap_mode here: joblib cannot memory-map compressed files)
+            loaded = joblib.load(PREPROCESSOR_PATH)
+            # preprocess.py saves {"preprocessor": ..., "feature_names": [...]}; older artifacts are the bare object
+            if isinstance(loaded, dict) and "preprocessor" in loaded:
+                PREPROCESSOR = loaded["preprocessor"]
+                app.state.feature_names = loaded.get("feature_names")
+            else:
+                PREPROCESSOR = loaded
             app.state.preprocessor_loaded = True
         except Exception as e:
             PREPROCESSOR = None
@@ -82,7 +135,7 @@ def load_artifacts():
     if os.path.exists(MODEL_PATH):
         try:
             # if model exists, its obj is loaded 
-            MODEL = joblib.load(MODEL_PATH)
+            MODEL = joblib.load(MODEL_PATH, mmap_mode="r")
             app.state.model_loaded = True
         except Exception as e:
             MODEL = None
@@ -91,24 +144,60 @@ def load_artifacts():
         MODEL = None
         app.state.model_loaded = False
 
+    # decided once here so requests do not have to inspect the preprocessor
+    NEEDS_DATAFRAME = PREPROCESSOR is None or _needs_dataframe(PREPROCESSOR)
+
+def _rows_to_ndarray(rows, col_index=None):
+    """Fill one contiguous float64 array (NaN for missing) from a list of dicts, without pandas.
+
+    With the default COL_INDEX the result is a view into a per-thread (MAX_BATCH, n_features) buffer
+    that is reused by the next call on the same thread, so it must be consumed before then.
+    """
+    if col_index is None:
+        col_index = COL_INDEX
+        X = _request_buffer(len(rows))
+    else:
+        X = np.full((len(rows), len(col_index)), np.nan, dtype=np.float64)
+    for i, r in enumerate(rows):
+        for k, v in r.items():
+            j = col_index.get(k)
+            if j is not None and v is not None:
+                X[i, j] = v
+    return X
+
+# returns a NaN-filled (n_rows, n_features) view of this thread's preallocated buffer so the request path
+# does not allocate; uvicorn runs handlers on the event loop thread and batches in worker threads, and neither
+# awaits between filling the buffer and predicting, so one buffer per thread is enough
+def _request_buffer(n_rows):
+    n_features = len(COL_INDEX)
+    if n_rows > MAX_BATCH:
+        # unusually large request: do not grow the cached buffer for it
+        return np.full((n_rows, n_features), np.nan, dtype=np.float64)
+    buf = getattr(_TLS, "buf", None)
+    if buf is None or buf.shape[1] != n_features:
+        buf = _TLS.buf = np.empty((MAX_BATCH, n_features), dtype=np.float64)
+    view = buf[:n_rows]
+    view.fill(np.nan)
+    return view
+
 def build_rows_from_named(named_rows, expected_cols):
     """Turn list of dicts or a single dict into a 2-D array in the expected order."""
-    import numpy as np
     if isinstance(named_rows, dict):
         named_rows = [named_rows]
-    rows = []
-    for r in named_rows:
-        rows.append([r.get(col, np.nan) for col in expected_cols])
-    return np.array(rows, dtype=float)
-
-@app.post("/predict_named")
-def predict_named(payload: NamedRows):
-    # convert incoming list-of-dicts into DataFrame so that ColumnTransformer can accept and use it 
-    try:
-        df = pd.DataFrame(payload.rows)
-    except Exception:
-        raise HTTPException(status_code=422, detail="Invalid payload: rows must be a list of dicts")
+    return _rows_to_ndarray(named_rows, {c: i for i, c in enumerate(expected_cols)})
 
+# converts list-of-dicts into DataFrame so that ColumnTransformer can accept and use it
+def _named_rows_to_df(rows):
+    # common case (our own Gradio UI): rows only use known columns and hold numbers / None, so the frame
+    # can be built directly in EXPECTED_COLS order (missing columns -> NaN) without a second reindex copy.
+    # Only the first row's keys are checked; columns= drops unknown keys of later rows anyway.
+    if EXPECTED_COLS and rows and rows[0].keys() <= EXPECTED_SET:
+        try:
+            return pd.DataFrame(rows, columns=EXPECTED_COLS, dtype=float)
+        except (TypeError, ValueError):
+            # e.g. categorical string values: use the generic path below
+            pass
+    df = pd.DataFrame(rows)
     # If EXPECTED_COLS is set, reindex DF to match same column order & turn missing columns into NaN
     if EXPECTED_COLS:
         df = df.reindex(columns=EXPECTED_COLS)
@@ -120,18 +209,113 @@ def predict_named(payload: NamedRows):
                 df = df.reindex(columns=list(cols))
         except Exception:
             pass
+    return df
+
+# picks the cheapest input the preprocessor accepts: a raw ndarray for numeric pipelines,
+# otherwise the DataFrame path (needed when a ColumnTransformer selects columns by name)
+def _rows_to_input(rows):
+    if NEEDS_DATAFRAME:
+        return _named_rows_to_df(rows)
+    return _rows_to_ndarray(rows)
+
+# predicts one batch of queued requests with a single transform + predict call,
+# then slices the predictions back to each waiting request
+def _predict_batch(batch):
+    all_rows = [row for rows, _ in batch for row in rows]
+    try:
+        preds = _predict_with_artifacts(_rows_to_input(all_rows))
+    except Exception:
+        # one bad request should not fail the whole batch: predict each request on its own
+        results = []
+        for rows, _ in batch:
+            try:
+                results.append(_predict_with_artifacts(_rows_to_input(rows)))
+            except Exception as e:
+                results.append(RuntimeError(str(e)))
+        return results
+    results = []
+    start = 0
+    for rows, _ in batch:
+        end = start + len(rows)
+        results.append(preds[start:end])
+        start = end
+    return results
+
+# background task: waits for the first request, keeps draining the queue until MAX_BATCH
+# requests or BATCH_TIMEOUT, then runs the whole batch at once
+async def _batch_worker():
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await BATCH_QUEUE.get()]
+        deadline = loop.time() + BATCH_TIMEOUT
+        while len(batch) < MAX_BATCH:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(BATCH_QUEUE.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        # run the blocking sklearn work off the event loop so new requests keep queueing
+        try:
+            results = await asyncio.to_thread(_predict_batch, batch)
+        except Exception as e:
+            results = [RuntimeError(str(e))] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
 
+@app.post(
+    "/predict_named",
+    openapi_extra={"requestBody": {"required": True, "content": {"application/json": {"schema": NAMED_ROWS_SCHEMA}}}},
+)
+async def predict_named(request: Request):
+    try:
+        payload = msgspec.json.decode(await request.body(), type=NamedRowsMsg)
+    except (msgspec.ValidationError, msgspec.DecodeError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid payload: {e}")
+    # rows are queued and converted to one DataFrame together with other waiting requests
     # ensure dataframe rows are numeric for numeric columns when applicable — let preprocessor handle missing
     try:
-        preds = _predict_with_artifacts(df)
+        if BATCH_QUEUE is None:
+            # batcher not running (e.g. startup event skipped): predict this request directly
+            try:
+                X = _rows_to_input(payload.rows)
+            except Exception:
+                raise HTTPException(status_code=422, detail="Invalid payload: rows must be a list of dicts")
+            preds = _predict_with_artifacts(X)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            await BATCH_QUEUE.put((payload.rows, future))
+            preds = await future
         return {"predictions": preds}
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=f"Invalid payload or transform error: {e}")
 
-# startup event: when the app starts FastAPI is told to load artifacts
+# startup event: when the app starts FastAPI is told to load artifacts and start the batcher
 @app.on_event("startup")
-def startup_event():
+async def startup_event():
+    global BATCH_QUEUE
     load_artifacts()
+    # one dummy prediction so the thread pools / lazy sklearn setup are paid at boot, not by the first user
+    if MODEL is not None and PREPROCESSOR is not None and EXPECTED_COLS:
+        try:
+            _predict_with_artifacts(_rows_to_input([{c: 0.0 for c in EXPECTED_COLS}]))
+        except Exception as e:
+            print(f"Warm-up prediction failed: {e}")
+    BATCH_QUEUE = asyncio.Queue()
+    app.state.batch_task = asyncio.create_task(_batch_worker())
+
+# shutdown event: stop the batcher task
+@app.on_event("shutdown")
+async def shutdown_event():
+    task = getattr(app.state, "batch_task", None)
+    if task is not None:
+        task.cancel()
 
 # Health endpoint: checks if server is running and artifacts are loaded 
 @app.get("/health")
@@ -152,8 +336,8 @@ def _predict_with_artifacts(X):
     if isinstance(X, pd.DataFrame):
         X_in = X
     else:
-        # convert to numpy array
-        X_in = np.array(X, dtype=float)
+        # convert to numpy array (no copy when X is already a float ndarray)
+        X_in = np.asarray(X, dtype=float)
 
     # if preprocessor is loaded, transforms X_in
     if PREPROCESSOR is not None:
@@ -172,26 +356,15 @@ def _predict_with_artifacts(X):
     else:
         # if not model loaded, return dummy: mean of row 
         preds = np.mean(X_proc, axis=1)
-    # coerce to python list and make JSON-safe:
-    safe_preds = []
-    # convert to 1-D python list
+    # coerce to python list and make JSON-safe in one vectorized pass:
+    # floats where finite, NaN / Inf -> null in JSON
     try:
-        arr = np.asarray(preds).ravel().tolist()
-    except Exception:
-        # fallback: try to coerce single value
-        arr = [preds]
-
-    for p in arr:
-        try:
-            v = float(p)
-            if not math.isfinite(v):
-                # NaN / Inf -> null in JSON
-                safe_preds.append(None)
-            else:
-                safe_preds.append(v)
-        except Exception:
-            # not convertible -> null
-            safe_preds.append(None)
+        preds_arr = np.asarray(preds, dtype=np.float64).ravel()
+    except (TypeError, ValueError):
+        # not convertible -> null
+        return [None] * int(np.size(preds))
+    finite = np.isfinite(preds_arr)
+    safe_preds = [v if f else None for v, f in zip(preds_arr.tolist(), finite.tolist())]
 
     return safe_preds
     # return preds.tolist()
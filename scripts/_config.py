@@ -0,0 +1,99 @@
+"""
+_config.py:
+- Parses config.yaml once into frozen dataclasses shared by the scripts and the tests.
+- Attribute access (CFG.paths.x_train) instead of nested dict lookups; optional keys get their defaults here.
+"""
+from dataclasses import dataclass, field
+from functools import cache
+from typing import Any, Dict, Optional, Tuple
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as _YamlLoader   # libyaml-backed parser when available
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+CONFIG_PATH = "config.yaml"
+
+
+@dataclass(frozen=True)
+class DataConfig:
+    local_path: str
+    preprocessed_path: str
+    target: str
+    url: str = ""
+    save_preprocessed_csv: bool = False
+    numeric_cols: Tuple[str, ...] = ()
+    categorical_cols: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class TrainConfig:
+    test_size: float
+    random_state: int
+    model_params: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class PathsConfig:
+    x_train: str
+    x_test: str
+    y_train: str
+    y_test: str
+
+
+@dataclass(frozen=True)
+class ArtifactsConfig:
+    model: str
+    preprocessor: str
+    metrics: str
+
+
+@dataclass(frozen=True)
+class Config:
+    data: DataConfig
+    train: TrainConfig
+    paths: PathsConfig
+    artifacts: ArtifactsConfig
+    # format of dense X tables: "csv", "parquet" or "feather" (sparse X and y are always .npz)
+    io_format: str = "csv"
+    # rare-category threshold for the categorical encoder (None keeps every category)
+    min_frequency: Optional[float] = None
+
+
+@cache
+def load_config(path=CONFIG_PATH):
+    """Read and parse config.yaml (once per path)."""
+    with open(path, "r") as f:
+        raw = yaml.load(f, Loader=_YamlLoader)
+    data = raw["data"]
+    paths = raw["paths"]
+    return Config(
+        data=DataConfig(
+            local_path=data["local_path"],
+            preprocessed_path=data["preprocessed_path"],
+            target=data["target"],
+            url=data.get("url") or "",
+            save_preprocessed_csv=data.get("save_preprocessed_csv", False),
+            numeric_cols=tuple(data.get("numeric_cols") or ()),
+            categorical_cols=tuple(data.get("categorical_cols") or ()),
+        ),
+        train=TrainConfig(
+            test_size=raw["train"]["test_size"],
+            random_state=raw["train"]["random_state"],
+            model_params=dict(raw["train"].get("model_params") or {}),
+        ),
+        paths=PathsConfig(
+            x_train=paths["X_train"],
+            x_test=paths["X_test"],
+            y_train=paths["y_train"],
+            y_test=paths["y_test"],
+        ),
+        artifacts=ArtifactsConfig(**raw["artifacts"]),
+        io_format=(raw.get("io") or {}).get("format", "csv"),
+        min_frequency=(raw.get("preprocess") or {}).get("min_frequency"),
+    )
+
+
+CFG = load_config()
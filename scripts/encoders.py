@@ -0,0 +1,184 @@
+"""
+encoders.py:
+- Custom sklearn-compatible transformers used inside the preprocessor ColumnTransformer.
+- Lives in its own module (not preprocess.py) so the pickled artifacts/preprocessor.joblib
+  refers to scripts.encoders and can be loaded by the server.
+"""
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, TransformerMixin
+
+
+class FastCategoricalEncoder(TransformerMixin, BaseEstimator):
+    """
+    Most-frequent imputation + one-hot encoding fused into one pass per column.
+
+    Each column is filled with its mode, factorized to int32 codes with pd.Categorical and all columns are
+    assembled into a single CSR matrix. Categories unseen during fit are ignored (all-zero row for that
+    column), like OneHotEncoder(handle_unknown="ignore").
+
+    min_frequency works like OneHotEncoder(min_frequency=..., handle_unknown="infrequent_if_exist"):
+    categories seen fewer times (int) or in a smaller fraction of rows (float) share one
+    "<col>_infrequent_sklearn" column, which unseen categories map to as well. categories_ holds only the
+    categories that keep their own column; the grouped ones are in infrequent_categories_.
+    """
+
+    def __init__(self, dtype=np.float64, min_frequency=None):
+        self.dtype = dtype
+        self.min_frequency = min_frequency
+
+    def _as_frame(self, X):
+        if isinstance(X, pd.DataFrame):
+            return X
+        return pd.DataFrame(np.asarray(X, dtype=object), columns=self.feature_names_in_)
+
+    def _min_count(self, n):
+        # smallest count a category needs to keep its own column
+        if self.min_frequency is None:
+            return 0
+        if isinstance(self.min_frequency, float) and self.min_frequency < 1:
+            return self.min_frequency * n
+        return self.min_frequency
+
+    def _fit_codes(self, X):
+        # learns fill value + categories per column and returns the codes of the fitted data
+        if isinstance(X, pd.DataFrame):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        else:
+            self.feature_names_in_ = np.asarray([f"x{i}" for i in range(np.shape(X)[1])], dtype=object)
+        self.n_features_in_ = len(self.feature_names_in_)
+        X = self._as_frame(X)
+        min_count = self._min_count(len(X))
+        self.fill_values_ = []
+        self.categories_ = []
+        self.infrequent_categories_ = []
+        codes = []
+        for col in self.feature_names_in_:
+            s = X[col]
+            mode = s.mode(dropna=True)
+            # an all-missing column gets a single placeholder category
+            fill = mode.iloc[0] if len(mode) else "missing"
+            cat = pd.Categorical(s.fillna(fill))
+            col_codes = cat.codes.astype(np.int32)
+            cats = cat.categories
+            infrequent = None
+            if min_count:
+                frequent = np.bincount(col_codes, minlength=len(cats)) >= min_count
+                if not frequent.all():
+                    infrequent = cats[~frequent]
+                    # frequent categories keep their (compacted) position, rare ones share the last slot
+                    remap = np.where(frequent, np.cumsum(frequent) - 1, frequent.sum()).astype(np.int32)
+                    col_codes = remap[col_codes]
+                    cats = cats[frequent]
+            self.fill_values_.append(fill)
+            self.categories_.append(cats)
+            self.infrequent_categories_.append(infrequent)
+            codes.append(col_codes)
+        return codes
+
+    def _n_outputs(self, i):
+        # one column per kept category, plus the shared infrequent column when there is one
+        return len(self.categories_[i]) + (self.infrequent_categories_[i] is not None)
+
+    def _assemble(self, codes, n):
+        # stacks (row, column offset + code) pairs of all columns into one CSR matrix
+        row_idx = np.arange(n, dtype=np.int32)
+        rows, cols = [], []
+        offset = 0
+        for i, col_codes in enumerate(codes):
+            # unknown categories come back as -1 and are dropped
+            known = col_codes >= 0
+            rows.append(row_idx[known])
+            cols.append(col_codes[known] + offset)
+            offset += self._n_outputs(i)
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int32)
+        cols = np.concatenate(cols) if cols else np.empty(0, dtype=np.int32)
+        data = np.ones(len(rows), dtype=self.dtype)
+        return sp.csr_matrix((data, (rows, cols)), shape=(n, offset), dtype=self.dtype)
+
+    def fit(self, X, y=None):
+        self._fit_codes(X)
+        return self
+
+    def fit_transform(self, X, y=None):
+        # single pass: the codes computed while fitting are reused for the output
+        return self._assemble(self._fit_codes(X), len(X))
+
+    def transform(self, X):
+        X = self._as_frame(X)
+        codes = []
+        for i, (col, fill, cats) in enumerate(zip(self.feature_names_in_, self.fill_values_, self.categories_)):
+            col_codes = pd.Categorical(X[col].fillna(fill), categories=cats).codes.astype(np.int32)
+            if self.infrequent_categories_[i] is not None:
+                # rare and unseen categories both go to the infrequent column
+                col_codes[col_codes < 0] = len(cats)
+            codes.append(col_codes)
+        return self._assemble(codes, len(X))
+
+    def get_feature_names_out(self, input_features=None):
+        if input_features is None:
+            input_features = self.feature_names_in_
+        names = []
+        for i, col in enumerate(input_features):
+            names += [f"{col}_{cat}" for cat in self.categories_[i]]
+            if self.infrequent_categories_[i] is not None:
+                names.append(f"{col}_infrequent_sklearn")
+        return np.asarray(names, dtype=object)
+
+
+class FastNumericScaler(TransformerMixin, BaseEstimator):
+    """
+    Median imputation + standard scaling as one NumPy kernel over a contiguous (n, n_numeric) float64 array.
+
+    Equivalent to Pipeline([SimpleImputer(strategy="median"), StandardScaler()]) without the per-step
+    validation and conversions. Zero-variance columns are left unscaled (std 1), like StandardScaler.
+    Statistics are always computed in float64; dtype only sets the output type.
+    """
+
+    def __init__(self, dtype=np.float64):
+        self.dtype = dtype
+
+    def _to_array(self, X):
+        if isinstance(X, pd.DataFrame):
+            # na_value turns nullable (Int32 / pd.NA) columns into NaN
+            return X.to_numpy(dtype=np.float64, na_value=np.nan)
+        return np.array(X, dtype=np.float64)
+
+    def _fit_filled(self, X):
+        # learns median / mean / std and returns X as a float64 array with the medians filled in
+        if isinstance(X, pd.DataFrame):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        arr = self._to_array(X)
+        self.n_features_in_ = arr.shape[1]
+        self.median_ = np.nanmedian(arr, axis=0)
+        # an all-missing column has no median; fill it with 0
+        self.median_[np.isnan(self.median_)] = 0.0
+        np.copyto(arr, self.median_, where=np.isnan(arr))
+        self.mean_ = arr.mean(axis=0)
+        self.std_ = arr.std(axis=0)
+        self.std_[self.std_ == 0] = 1.0
+        return arr
+
+    def fit(self, X, y=None):
+        self._fit_filled(X)
+        return self
+
+    def fit_transform(self, X, y=None):
+        # single pass: the median-filled array from fitting is standardized in place
+        arr = self._fit_filled(X)
+        arr -= self.mean_
+        arr /= self.std_
+        return arr.astype(self.dtype, copy=False)
+
+    def transform(self, X):
+        arr = self._to_array(X)
+        np.copyto(arr, self.median_, where=np.isnan(arr))
+        arr -= self.mean_
+        arr /= self.std_
+        return arr.astype(self.dtype, copy=False)
+
+    def get_feature_names_out(self, input_features=None):
+        if input_features is None:
+            input_features = getattr(self, "feature_names_in_", [f"x{i}" for i in range(self.n_features_in_)])
+        return np.asarray(input_features, dtype=object)
@@ -2,11 +2,12 @@
 ingest.py: 
 - Reads raw dataset from Kaggle CSV.
 - Drops unwanted/missing columns.
-- Saves data/preprocessed/preprocessed_data.csv.
+- Saves data/preprocessed/preprocessed_data.parquet (plus an optional CSV copy).
+- Run from the repo root as a module: python -m scripts.ingest
 """
 import pandas as pd
 import os
-import yaml
+from scripts._config import CFG
 
 """
 Citation:
@@ -14,20 +15,35 @@ OpenAI. (2025). ChatGPT (Version 5.1) [Large language model]. https://chat.opena
 Conversation with ChatGPT on November 20, 2025, used to generate preprocessing code snippets.
 """
 
-with open("config.yaml", "r") as f:
-    config = yaml.safe_load(f)
+# settings are parsed once from config.yaml into CFG (see scripts/_config.py)
+raw_path = CFG.data.local_path
+preprocessed_path = CFG.data.preprocessed_path
+save_preprocessed_csv = CFG.data.save_preprocessed_csv
+target_col = CFG.data.target
 
-raw_path = config["data"]["local_path"]
-preprocessed_path = config["data"]["preprocessed_path"]
-target_col = config["data"]["target"]
-
-test_size = config["train"]["test_size"]
-random_state = config["train"]["random_state"]
+test_size = CFG.train.test_size
+random_state = CFG.train.random_state
 
 """
 End cited block
 """
-df = pd.read_csv(raw_path)
+
+# explicit dtypes so pandas does not infer (and widen) each column itself
+NUMERIC_COLS = [
+    "Aroma", "Flavor", "Aftertaste", "Acidity", "Body", "Balance", "Uniformity", "Clean.Cup",
+    "Sweetness", "Cupper.Points", "Total.Cup.Points", "Moisture", "Quakers",
+    "altitude_low_meters", "altitude_high_meters", "altitude_mean_meters"
+]
+INT_COLS = ["Number.of.Bags", "Category.One.Defects", "Category.Two.Defects"]
+# columns that are always dropped (see notes below), so they are never read in the first place
+DROPPED_COLS = {"Farm.Name", "Lot.Number"}
+
+# also skips the raw file's blank-header index column ("Unnamed: 0") so it never reaches the preprocessed data
+df = pd.read_csv(
+    raw_path,
+    dtype={**{c: "float32" for c in NUMERIC_COLS}, **{c: "Int32" for c in INT_COLS}},
+    usecols=lambda c: c not in DROPPED_COLS and not c.startswith("Unnamed"),
+)
 
 # Data Structure
 print("Data Structure")
@@ -37,7 +53,7 @@ print(f"Data Types:\n{df.dtypes}")
 print(f"Missing Values:\n{df.isnull().sum()}")
 
 """
-This data contains 1339 rows and 44 columns. 
+This data contains 1339 rows and 44 columns (41 are read; the index column, Farm.Name and Lot.Number are skipped). 
 
 "Number.of.Bags", "Category.One.Defects", and "Category.Two.Defects" are stored as integer data type.
 "Aroma", "Flavor", "Aftertaste", "Acidity", "Body", "Balance", "Uniformity", "Clean.Cup", "Sweetness", "Cupper.Points", "Total.Cup.Points", "Moisture",
@@ -48,22 +64,15 @@ This data contains 1339 rows and 44 columns.
 """
 
 # Owner is missing 7 entries. Owner should have impact on coffee quality, represented by Total.Cup.Points. Therefore, rows with empty entries can be dropped.
-df.dropna(subset=["Owner"], inplace=True)
-
 # Country.of.Origin (missing 1 value) will affect coffee quality, so instead of dropping this column, we will drop the row that is missing an entry.
-df.dropna(subset=["Country.of.Origin"], inplace=True)
-
-# Farm.Name is missing 359 entries. This has no impact of coffee quality, so drop this column.
-df.drop(columns=["Farm.Name"], inplace=True)
-
-# Lot.Number is missing 1063 entries. There are too many missing entries, so drop this column.
-df.drop(columns=["Lot.Number"], inplace=True)
-
 # Owner.1 is only missing 7 entries, drop rows where na.
-df.dropna(subset=["Owner.1"], inplace=True)
-
 # Quakers is only missing 1 entry, so throw out row where missing value.
-df.dropna(subset=["Quakers"], inplace=True)
+# All four are handled by one boolean mask over just these columns (one pass, one copy).
+keep = df[["Owner", "Country.of.Origin", "Owner.1", "Quakers"]].notna().all(axis=1)
+df = df.loc[keep].reset_index(drop=True)
+
+# Farm.Name is missing 359 entries. This has no impact of coffee quality, so this column is not read (see DROPPED_COLS).
+# Lot.Number is missing 1063 entries. There are too many missing entries, so this column is not read either.
 
 """
 Allow the rest of this data to be preprocessed by the imputer in the data pipeline.
@@ -79,5 +88,12 @@ print(f"Missing Values:\n{df.isnull().sum()}")
 os.makedirs(os.path.dirname(preprocessed_path), exist_ok=True)
 # The above code snipet was generated by chatGPT 5.1 at 11:05p on 11/20/25.
 
-df.to_csv(preprocessed_path, index=False)
-print('Saved cleaned data to {preprocessed_path}')
\ No newline at end of file
+# Parquet is columnar + binary: smaller, much faster to read back and keeps the dtypes set above
+df.to_parquet(preprocessed_path, engine="pyarrow", compression="zstd", index=False)
+print(f'Saved cleaned data to {preprocessed_path}')
+
+# optional CSV copy for human inspection
+if save_preprocessed_csv:
+    csv_path = os.path.splitext(preprocessed_path)[0] + ".csv"
+    df.to_csv(csv_path, index=False)
+    print(f'Saved CSV copy to {csv_path}')
\ No newline at end of file
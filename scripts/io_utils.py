@@ -0,0 +1,164 @@
+"""
+io_utils.py:
+- Shared table read/write helpers for the pipeline scripts.
+- Uses pyarrow's multi-threaded CSV reader/writer when pyarrow is installed, pandas otherwise.
+- Optional Parquet / Feather output (io.format: "parquet" or "feather" in config.yaml) skips CSV serialization entirely.
+- Sparse feature matrices are stored as scipy .npz plus a .features.json list of column names,
+  target vectors as compressed .npz (key "y").
+"""
+import os
+import json
+from urllib.request import urlopen
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except ImportError:   # pandas fallback below
+    pa = None
+    pacsv = None
+    pq = None
+
+# file extension used for each supported table format
+FORMAT_SUFFIX = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+
+
+def with_format(path, fmt):
+    """Swap the extension of a configured (.csv) path for the one matching fmt."""
+    return os.path.splitext(path)[0] + FORMAT_SUFFIX[fmt]
+
+
+def read_csv_fast(source, columns=None, dtype=None):
+    """
+    Read a local CSV file or http(s) URL into a DataFrame.
+
+    columns: only parse these columns (names missing from the file are skipped, not an error).
+    dtype: {column: dtype} hints, e.g. {"Aroma": "float32"}, so types are not inferred per column.
+    """
+    wanted = set(columns) if columns is not None else None
+    if pacsv is None:
+        usecols = (lambda c: c in wanted) if wanted is not None else None
+        return pd.read_csv(source, usecols=usecols, dtype=dtype)
+    read_opts = pacsv.ReadOptions(use_threads=True)
+    # quoted line breaks in cells: the threaded reader splits the file into blocks too
+    parse_opts = pacsv.ParseOptions(newlines_in_values=True)
+    # empty cells -> null like pandas does (pyarrow keeps "" for string columns by default)
+    convert_opts = pacsv.ConvertOptions(
+        strings_can_be_null=True,
+        column_types={c: pa.from_numpy_dtype(np.dtype(t)) for c, t in (dtype or {}).items()},
+        include_columns=list(columns) if columns is not None else None,
+    )
+    try:
+        table = _read_arrow_csv(source, read_opts, parse_opts, convert_opts)
+    except pa.ArrowKeyError:
+        if columns is None:
+            raise
+        # some requested column is not in the file: read everything and keep what exists,
+        # so the caller can report the missing columns itself
+        convert_opts.include_columns = []
+        table = _read_arrow_csv(source, read_opts, parse_opts, convert_opts)
+        table = table.select([c for c in columns if c in table.column_names])
+    # missing strings come back as None; turn them into NaN so the imputers see them as missing
+    return table.to_pandas().fillna(np.nan)
+
+
+def _read_arrow_csv(source, read_opts, parse_opts, convert_opts):
+    if source.startswith(("http://", "https://")):
+        with urlopen(source) as f:
+            return pacsv.read_csv(f, read_options=read_opts, parse_options=parse_opts, convert_options=convert_opts)
+    return pacsv.read_csv(source, read_options=read_opts, parse_options=parse_opts, convert_options=convert_opts)
+
+
+def read_parquet_columns(path, columns=None):
+    """Read a Parquet file, optionally only the given columns (names missing from the file are skipped)."""
+    if columns is not None:
+        available = set(pq.read_schema(path).names)
+        columns = [c for c in columns if c in available]
+    # parquet returns missing strings as None; turn them back into NaN so the imputers see them as missing
+    return pd.read_parquet(path, columns=columns).fillna(np.nan)
+
+
+def write_csv_fast(df, path):
+    """Write a DataFrame (or Series) to CSV without the index."""
+    if isinstance(df, pd.Series):
+        df = df.to_frame()
+    if pacsv is None:
+        df.to_csv(path, index=False)
+        return
+    pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), path)
+
+
+def write_table(df, path, fmt="csv"):
+    """Write df in the given format next to the configured path; returns the path written."""
+    if isinstance(df, pd.Series):
+        df = df.to_frame()
+    out_path = with_format(path, fmt)
+    if fmt == "parquet":
+        df.to_parquet(out_path, engine="pyarrow", compression="zstd", index=False)
+    elif fmt == "feather":
+        # Arrow IPC: no compression, fastest to write and read back; needs a default RangeIndex
+        df.reset_index(drop=True).to_feather(out_path)
+    else:
+        write_csv_fast(df, out_path)
+    return out_path
+
+
+def read_table(path, fmt="csv"):
+    """Read a table written by write_table."""
+    in_path = with_format(path, fmt)
+    if fmt == "parquet":
+        return pd.read_parquet(in_path)
+    if fmt == "feather":
+        return pd.read_feather(in_path)
+    return read_csv_fast(in_path)
+
+
+def save_sparse(X, feature_names, path):
+    """Save a sparse matrix as <path>.npz (CSR) with its column names in <path>.features.json."""
+    base = os.path.splitext(path)[0]
+    sp.save_npz(base + ".npz", sp.csr_matrix(X))
+    with open(base + ".features.json", "w") as f:
+        json.dump(list(feature_names), f)
+    return base + ".npz"
+
+
+def remove_stale_siblings(path, keep):
+    """
+    Delete the other encodings of path (.npz + .features.json and every table format) left by earlier runs,
+    keeping only the file just written (keep), so the loaders below never pick up an outdated copy.
+    """
+    base = os.path.splitext(path)[0]
+    suffixes = [".npz", ".features.json"] + list(FORMAT_SUFFIX.values())
+    # a sparse .npz keeps its feature-name list
+    kept = {keep, base + ".features.json"} if keep.endswith(".npz") else {keep}
+    for stale in {base + s for s in suffixes} - kept:
+        if os.path.exists(stale):
+            os.remove(stale)
+
+
+def save_target(y, path):
+    """Save a target vector as <path>.npz (compressed, float32, key "y")."""
+    base = os.path.splitext(path)[0]
+    np.savez_compressed(base + ".npz", y=np.asarray(y, dtype=np.float32))
+    return base + ".npz"
+
+
+def load_target(path, fmt="csv"):
+    """Load a target vector saved by preprocess.py: the .npz when present, else the single-column table."""
+    npz_path = os.path.splitext(path)[0] + ".npz"
+    if os.path.exists(npz_path):
+        with np.load(npz_path) as f:
+            return f["y"]
+    return read_table(path, fmt).squeeze().to_numpy()
+
+
+def load_matrix(path, fmt="csv"):
+    """Load a feature matrix saved by preprocess.py: the sparse .npz when present, else the dense table."""
+    npz_path = os.path.splitext(path)[0] + ".npz"
+    if os.path.exists(npz_path):
+        return sp.load_npz(npz_path)
+    return read_table(path, fmt)
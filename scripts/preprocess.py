@@ -1,198 +1,242 @@
 """
 preprocess.py: 
-- Reads preprocessed CSV.
+- Reads the cleaned dataset: CSV from data.url when set, else data.preprocessed_path (Parquet or CSV).
 - Verifies required columns.
 - Splits into train/test.
 - Fits and applies numeric + categorical pipelines.
-- Saves cleaned train/test CSVs.
-- Saves artifacts/preprocessor.joblib.
+- Saves the sparse train/test feature matrices and y as .npz (dense X as CSV, Parquet or Feather, see io.format in config.yaml).
+- Saves artifacts/preprocessor.joblib (fitted preprocessor + feature names, lz4-compressed).
+- Skips all of the above when the .meta.json next to the preprocessor artifact shows nothing changed since the last run.
+- Run from the repo root as a module: python -m scripts.preprocess
 
 Citation:
 OpenAI. (2025). ChatGPT (Version 5.1) [Large language model]. https://chat.openai.com  
 Conversation with ChatGPT on November 20, 2025, used to generate some preprocessing and testing code snippets.
 """
-import os, yaml, joblib, sklearn
+import os, json, hashlib, joblib
+from urllib.request import Request, urlopen
+from importlib.util import find_spec
 import pandas as pd, numpy as np
+import scipy.sparse as sp
+from scripts.io_utils import (read_csv_fast, read_parquet_columns, write_table, save_sparse, save_target,
+                             remove_stale_siblings)
+from scripts._config import CFG
+from scripts.encoders import FastCategoricalEncoder, FastNumericScaler
 from sklearn.model_selection import train_test_split
-from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
 
-"""
-Cited block from chatGPT 5.1 at 10:10p on 11/20/25. 
-
-Citation:
-OpenAI. (2025). ChatGPT (Version 5.1) [Large language model]. https://chat.openai.com  
-Conversation with ChatGPT on November 20, 2025, used to generate preprocessing code snippets.
-"""
-
-with open("config.yaml", "r") as f:
-    config = yaml.safe_load(f)
-
-raw_path = config["data"]["local_path"]
-url = config["data"].get("url", "")
-preprocessed_path = config["data"]["preprocessed_path"]
-target_col = config["data"]["target"]
-test_size = config["train"]["test_size"]
-random_state = config["train"]["random_state"]
-
-"""
-End cited block
-"""
-
-if url:
-    print(f"Reading cleaned dataset from {url}")
-    df = pd.read_csv(url)
-else:
-    df = pd.read_csv(preprocessed_path)
-
-numeric_cols = [
-    "Number.of.Bags", "Category.One.Defects", "Category.Two.Defects", "Aroma", "Flavor",
-    "Aftertaste", "Acidity", "Body", "Balance", "Uniformity", "Clean.Cup", "Sweetness",
-    "Cupper.Points", "Moisture", "Quakers", "altitude_low_meters",
-    "altitude_high_meters", "altitude_mean_meters"
-]
-categorical_cols = [
-    "Species", "Owner", "Country.of.Origin", "Mill", "ICO.Number", "Company", "Altitude",
-    "Region", "Producer", "Bag.Weight", "In.Country.Partner", "Harvest.Year",
-    "Grading.Date", "Owner.1", "Variety", "Processing.Method", "Color", "Expiration",
-    "Certification.Body", "Certification.Address", "Certification.Contact", "unit_of_measurement"
-]
-
-# drop accidental index columns created by previous saves
-df = df.loc[:, ~df.columns.str.contains(r'^Unnamed')]
-
-# making sure columns exist
-missing_num = [c for c in numeric_cols if c not in df.columns]
-missing_cat = [c for c in categorical_cols if c not in df.columns]
-if missing_num or missing_cat:
-    raise ValueError(f"Missing cols. numeric: {missing_num}, categorical: {missing_cat}")
-
-"""
-The below block of code was derived from AIPI503 - Ed Lessons Day 4 Challenge
-This course was taught by Dr. Daniel E. Davis, Ph.D.
-"""
-
-if target_col not in df.columns:
-    raise ValueError(f"ERROR: Required target column '{target_col}' is missing from the dataset.")
-
-X = df.drop(columns=[target_col])
-y = df[target_col]
-
-# Splitting data. 20% test, 80% train
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
-
-"""
-End cited block
-"""
-
-# --- version-aware OneHotEncoder + categorical pipeline ---------------------
-# due to running into sparse issues ChatGPT suggested this code snippet on 11/20/2025 at 8:53pm PST 
-
-# defining numeric pipeline
-numeric_pipeline = Pipeline([
-    ("imputer", SimpleImputer(strategy="median")),   # missing numeric flled with median
-    ("scaler", StandardScaler())   # standardize 
-])
-
-skl_ver = tuple(int(x) for x in sklearn.__version__.split('.')[:2])
-# build a OneHotEncoder compatible with this sklearn version
-# the version check prevents the “sparse vs sparse_output” error
-if skl_ver >= (1, 2):
-    # sklearn 1.2+ uses sparse_output
-    ohe = OneHotEncoder(handle_unknown="ignore", sparse_output=False)
-else:
-    # older sklearn uses sparse
-    ohe = OneHotEncoder(handle_unknown="ignore", sparse=False)
-
-# defining categorical pipeline 
-categorical_pipeline = Pipeline([
-    ("imputer", SimpleImputer(strategy="most_frequent")),   # missing categories filled w/most frequent 
-    ("ohe", ohe)
-])
-
-# combine 2 pipelines into one obj that can full dataframes
-preprocessor = ColumnTransformer(
-    transformers=[
-        ("num", numeric_pipeline, numeric_cols),
-        ("cat", categorical_pipeline, categorical_cols)
-    ],
-    remainder="drop",
-    n_jobs=1
-)
-# ----------------------------------END OF CITED BLOCK -----------------------------------------
-
-# fit preprocessor on training data only
-preprocessor.fit(X_train)
-
-# transform train and test
-X_train_t = preprocessor.transform(X_train)
-X_test_t  = preprocessor.transform(X_test)
-
-
-# Build feature names: pulls the encoded column names from 
-# the fitted OneHotEncoder so the resulting DataFrames have readable column headers
-num_features = numeric_cols.copy()   # numeric feature names are numeric_cols
-cat_features = []
-# access the fitted transformer objects safely
-try:
-    # ColumnTransformer stores the transformers under named_transformers_
-    cat_tr = preprocessor.named_transformers_["cat"]
-    # cat_tr is a Pipeline; get the OHE inside it
-    if hasattr(cat_tr, "named_steps") and "ohe" in cat_tr.named_steps:
-        fitted_ohe = cat_tr.named_steps["ohe"]
-    else:
-        # fallback: if the cat transformer itself is an OHE
-        fitted_ohe = cat_tr
-    # get feature names out (works on modern sklearn)
+# categorical columns with more distinct training values than this go into the "cat_high" group
+HIGH_CARDINALITY = 50
+
+PREPROCESSOR_PATH = CFG.artifacts.preprocessor
+# lz4 dumps/loads the preprocessor (mostly category vocabularies) several times faster than zlib at a
+# similar size; joblib needs the lz4 package for it, so fall back to zlib (stdlib) when it is missing
+ARTIFACT_COMPRESS = ("lz4", 3) if find_spec("lz4") else ("zlib", 3)
+# records the cache key of the run that produced the current preprocessor + cleaned outputs
+META_PATH = os.path.splitext(PREPROCESSOR_PATH)[0] + ".meta.json"
+
+# builds the (unfitted) ColumnTransformer: numeric columns are imputed + scaled, categorical columns are
+# split by cardinality in X_train and one-hot encoded
+def build_preprocessor(X_train, numeric_cols, categorical_cols, min_frequency=None):
+    # --- numeric + categorical pipelines ---------------------
+    # due to running into sparse issues ChatGPT suggested this code snippet on 11/20/2025 at 8:53pm PST 
+
+    # defining numeric pipeline: missing numeric filled with median, then standardized,
+    # fused into one vectorized NumPy pass (see scripts/encoders.py); float32 output halves the matrix size
+    numeric_pipeline = FastNumericScaler(dtype=np.float32)
+
+    # defining categorical "pipeline": fused most-frequent imputation + one-hot encoding (see scripts/encoders.py),
+    # one pass per column straight into a sparse matrix; unknown categories are ignored like handle_unknown="ignore",
+    # or grouped with the rare ones when min_frequency is set (like handle_unknown="infrequent_if_exist")
+    categorical_pipeline = FastCategoricalEncoder(dtype=np.float32, min_frequency=min_frequency)
+
+    # ColumnTransformer parallelizes across its transformers (not within one), so the categorical columns
+    # are split into low- and high-cardinality groups to give the workers more independent work items
+    cardinality = X_train[categorical_cols].nunique()
+    low_card_cols = [c for c in categorical_cols if cardinality[c] <= HIGH_CARDINALITY]
+    high_card_cols = [c for c in categorical_cols if cardinality[c] > HIGH_CARDINALITY]
+    cat_groups = [("cat_low", low_card_cols), ("cat_high", high_card_cols)]
+
+    # combine the pipelines into one obj that can full dataframes (each entry gets its own clone when fitted)
+    preprocessor = ColumnTransformer(
+        transformers=[("num", numeric_pipeline, numeric_cols)]
+        + [(name, categorical_pipeline, cols) for name, cols in cat_groups],
+        remainder="drop",
+        # no n_jobs here: it would be pickled into the artifact and make every server-side transform
+        # spin up worker processes; the fit in main() gets its workers from joblib.parallel_backend instead
+        n_jobs=None,
+        # keep plain column names ("Aroma", "Species_Arabica") instead of "num__Aroma" / "cat_low__Species_Arabica"
+        verbose_feature_names_out=False
+    )
+    # ----------------------------------END OF CITED BLOCK -----------------------------------------
+    return preprocessor
+
+# version of a remote file from a HEAD request: its ETag, else Last-Modified; None when the server
+# sends neither or cannot be reached (then the run is not cached)
+def remote_version(url):
     try:
-        cat_features = list(fitted_ohe.get_feature_names_out(categorical_cols))
-    except Exception:
-        # fallback: build generic names if method missing
-        # prefix each category name with the column name
-        cat_features = []
-        # try transform a tiny sample to see number of output columns (not ideal)
-        # but we can at least name them cat_0..cat_n
-        n_cat_out = X_train_t.shape[1] - len(num_features)
-        cat_features = [f"cat_{i}" for i in range(n_cat_out)]
-except Exception as e:
-    # If anything fails, fallback to generic names without breaking pipeline
-    print("Warning building categorical feature names:", e)
-    n_cat_out = X_train_t.shape[1] - len(num_features)
-    cat_features = [f"cat_{i}" for i in range(n_cat_out)]
-
-feature_names = num_features + cat_features
-
-# converts the possibly sparse matrix to a regular Pandas DataFrame
-def to_dense_df(X_t, feature_names, index):
+        with urlopen(Request(url, method="HEAD"), timeout=10) as resp:
+            return resp.headers.get("ETag") or resp.headers.get("Last-Modified")
+    except OSError:
+        return None
+
+# hash of everything that determines the outputs: settings + the input's version
+# (local file: modification time; url: ETag / Last-Modified); None means "do not cache"
+def compute_cache_key(settings, url, input_path):
+    version = remote_version(url) if url else os.stat(input_path).st_mtime
+    if version is None:
+        return None
+    return hashlib.sha256(repr((settings, url, version)).encode()).hexdigest()
+
+# True when the last run used the same cache key and everything it wrote is still on disk
+def is_cached(cache_key):
+    if cache_key is None or not os.path.exists(META_PATH):
+        return False
+    with open(META_PATH) as f:
+        meta = json.load(f)
+    outputs = meta.get("outputs", []) + [PREPROCESSOR_PATH]
+    return meta.get("cache_key") == cache_key and all(os.path.exists(p) for p in outputs)
+
+# records the cache key and the written outputs for is_cached
+def save_meta(cache_key, outputs):
+    with open(META_PATH, "w") as f:
+        json.dump({"cache_key": cache_key, "outputs": outputs}, f, indent=4)
+
+# converts a dense matrix to a regular Pandas DataFrame (fresh RangeIndex: the writers drop the index anyway)
+def to_dense_df(X_t, feature_names):
     if hasattr(X_t, "toarray"):
         arr = X_t.toarray()
     else:
         arr = X_t
-    return pd.DataFrame(arr, columns=feature_names, index=index)
-
-X_train_df = to_dense_df(X_train_t, feature_names, X_train.index)
-X_test_df  = to_dense_df(X_test_t,  feature_names, X_test.index)
-
-# ensure directories exist
-os.makedirs(os.path.dirname(config["paths"]["X_train"]), exist_ok=True)
-os.makedirs(os.path.dirname(config["paths"]["X_test"]), exist_ok=True)
-os.makedirs(os.path.dirname(config["paths"]["y_train"]), exist_ok=True)
-os.makedirs(os.path.dirname(config["paths"]["y_test"]), exist_ok=True)
-os.makedirs("artifacts", exist_ok=True)
-# The above code snipet was generated by chatGPT 5.1 at 10:00p on 11/20/25.
-
-# write 4 CSVs to the locations defined in config.yaml
-X_train_df.to_csv(config["paths"]["X_train"], index=False)
-X_test_df.to_csv(config["paths"]["X_test"], index=False)
-y_train.to_csv(config["paths"]["y_train"], index=False)
-y_test.to_csv(config["paths"]["y_test"], index=False)
-# File locations generated by chatGPT 5.1 at 10:15p on 11/20/25.
-
-# Save the fitted/trained preprocessing obj for later use (train.py & server)
-# This was suggested by ChatGPT on 11/20/2025 around 8:20pm PST
-joblib.dump(preprocessor, "artifacts/preprocessor.joblib")
-print("Saved preprocessor to artifacts/preprocessor.joblib")
-print("X_train shape:", X_train_df.shape)
-print("X_test shape:", X_test_df.shape)
+    return pd.DataFrame(arr, columns=feature_names)
+
+# writes a transformed matrix: sparse output is kept sparse (.npz + feature names),
+# dense output (ColumnTransformer densifies when the density reaches sparse_threshold, e.g. few categories
+# left after min_frequency) goes through the regular table writer; whatever an earlier run wrote in the
+# other format is deleted, since load_matrix prefers the .npz whenever one exists
+def save_matrix(X_t, feature_names, path, io_format="csv"):
+    if sp.issparse(X_t):
+        out_path = save_sparse(X_t, feature_names, path)
+    else:
+        out_path = write_table(to_dense_df(X_t, feature_names), path, io_format)
+    remove_stale_siblings(path, keep=out_path)
+    return out_path
+
+
+def main():
+    # Cited block from chatGPT 5.1 at 10:10p on 11/20/25.
+    # OpenAI. (2025). ChatGPT (Version 5.1) [Large language model]. https://chat.openai.com
+    # Conversation with ChatGPT on November 20, 2025, used to generate preprocessing code snippets.
+    # settings are parsed once from config.yaml into CFG (see scripts/_config.py)
+    url = CFG.data.url
+    preprocessed_path = CFG.data.preprocessed_path
+    target_col = CFG.data.target
+    # output format for dense X tables: "csv" (default), "parquet" or "feather"
+    io_format = CFG.io_format
+    # feature columns, defined once in config.yaml
+    numeric_cols = list(CFG.data.numeric_cols)
+    categorical_cols = list(CFG.data.categorical_cols)
+    min_frequency = CFG.min_frequency
+    test_size = CFG.train.test_size
+    random_state = CFG.train.random_state
+    # End cited block
+
+    # skip the whole fit when nothing changed since the last run
+    settings = (numeric_cols, categorical_cols, min_frequency, target_col, test_size, random_state, io_format,
+                preprocessed_path, CFG.paths)
+    cache_key = compute_cache_key(settings, url, preprocessed_path)
+    if is_cached(cache_key):
+        print(f"Preprocessor and cleaned data are up to date (cached, see {META_PATH}); nothing to do")
+        return
+
+    # only the feature + target columns are parsed (accidental "Unnamed: 0" index columns from previous
+    # saves are never read), every column with an explicit dtype instead of per-column inference
+    wanted = numeric_cols + categorical_cols + [target_col]
+    dtypes = {**{c: "float32" for c in numeric_cols + [target_col]}, **{c: str for c in categorical_cols}}
+    if url:
+        print(f"Reading cleaned dataset from {url}")
+        df = read_csv_fast(url, columns=wanted, dtype=dtypes)
+    elif preprocessed_path.endswith(".parquet"):
+        df = read_parquet_columns(preprocessed_path, columns=wanted)
+    else:
+        df = read_csv_fast(preprocessed_path, columns=wanted, dtype=dtypes)
+
+    # making sure columns exist
+    missing_num = [c for c in numeric_cols if c not in df.columns]
+    missing_cat = [c for c in categorical_cols if c not in df.columns]
+    if missing_num or missing_cat:
+        raise ValueError(f"Missing cols. numeric: {missing_num}, categorical: {missing_cat}")
+
+    """
+    The below block of code was derived from AIPI503 - Ed Lessons Day 4 Challenge
+    This course was taught by Dr. Daniel E. Davis, Ph.D.
+    """
+
+    if target_col not in df.columns:
+        raise ValueError(f"ERROR: Required target column '{target_col}' is missing from the dataset.")
+
+    X = df.drop(columns=[target_col])
+    y = df[target_col]
+
+    # Splitting data. 20% test, 80% train
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+    """
+    End cited block
+    """
+
+    preprocessor = build_preprocessor(X_train, numeric_cols, categorical_cols, min_frequency)
+
+    # fit + transform with joblib's process-based loky backend so the transformers run side by side
+    with joblib.parallel_backend("loky", n_jobs=-1):
+        # fit preprocessor on training data only; fit_transform returns the training output of that same pass
+        # (ColumnTransformer.fit runs fit_transform internally anyway, so a separate transform was a second pass)
+        X_train_t = preprocessor.fit_transform(X_train)
+
+        # transform test
+        X_test_t  = preprocessor.transform(X_test)
+
+    # float32 is plenty for the model (the random forest works in float32 internally anyway);
+    # no-op when every transformer already produced float32
+    X_train_t = X_train_t.astype(np.float32, copy=False)
+    X_test_t = X_test_t.astype(np.float32, copy=False)
+
+
+    # feature names come straight from the fitted ColumnTransformer (numeric names, then "<col>_<category>"
+    # for each categorical group, in output column order); computed once and shipped with the artifact
+    feature_names = preprocessor.get_feature_names_out().tolist()
+
+    # ensure directories exist (deduplicated: all four outputs usually share data/cleaned/)
+    out_paths = (CFG.paths.x_train, CFG.paths.x_test, CFG.paths.y_train, CFG.paths.y_test, PREPROCESSOR_PATH, META_PATH)
+    for d in {os.path.dirname(p) for p in out_paths} - {""}:
+        os.makedirs(d, exist_ok=True)
+    # The above code snipet was generated by chatGPT 5.1 at 10:00p on 11/20/25.
+
+    # write 4 outputs to the locations defined in config.yaml (X as .npz when sparse, else in io.format; y always as .npz)
+    outputs = [
+        save_matrix(X_train_t, feature_names, CFG.paths.x_train, io_format),
+        save_matrix(X_test_t, feature_names, CFG.paths.x_test, io_format),
+        save_target(y_train, CFG.paths.y_train),
+        save_target(y_test, CFG.paths.y_test),
+    ]
+    # File locations generated by chatGPT 5.1 at 10:15p on 11/20/25.
+
+    # Save the fitted/trained preprocessing obj for later use (train.py & server)
+    # This was suggested by ChatGPT on 11/20/2025 around 8:20pm PST
+    # bundled with its feature names, compressed with ARTIFACT_COMPRESS (lz4 when installed)
+    joblib.dump(
+        {"preprocessor": preprocessor, "feature_names": feature_names},
+        PREPROCESSOR_PATH,
+        compress=ARTIFACT_COMPRESS
+    )
+    print(f"Saved preprocessor to {PREPROCESSOR_PATH}")
+    print("X_train shape:", X_train_t.shape)
+    print("X_test shape:", X_test_t.shape)
+
+    # written last, so an interrupted run is never mistaken for a complete one
+    save_meta(cache_key, outputs)
+
+
+# only run the pipeline when executed (python -m scripts.preprocess), not on import
+if __name__ == "__main__":
+    main()
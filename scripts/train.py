@@ -3,6 +3,7 @@ train.py:
 - Reads data/cleaned/.
 - Trains RandomForestRegressor model on data
 - Saves artifacts/model.joblib.
+- Run from the repo root as a module: python -m scripts.train
 
 Citation: 
 
@@ -18,101 +19,110 @@ Code for training a RandomForestRegressor with Weights & Biases logging, includi
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 import numpy as np
 import joblib
-import yaml
 from sklearn.ensemble import RandomForestRegressor
-import pandas as pd
 import wandb
 import os
 import json
-
-# W and B tracking of model
-run = wandb.init(
-    # Set the wandb entity where your project will be logged (generally your team name).
-    entity="ace40-duke-university",
-    # Set the wandb project where this run will be logged.
-    project="Module-Project-3",
-    # Track hyperparameters and run metadata.
-    config={
-        "model_type": "RandomForestRegressor",
-        "n_estimators": 100,
-        "dataset": "cleaned coffee data",
+from scripts.io_utils import load_matrix, load_target
+from scripts._config import CFG
+
+
+def main():
+    # W and B tracking of model
+    run = wandb.init(
+        # Set the wandb entity where your project will be logged (generally your team name).
+        entity="ace40-duke-university",
+        # Set the wandb project where this run will be logged.
+        project="Module-Project-3",
+        # Track hyperparameters and run metadata.
+        config={
+            "model_type": "RandomForestRegressor",
+            "n_estimators": 100,
+            "dataset": "cleaned coffee data",
+        }
+        # Config built by ChatGOT 5.1 at 9:13p on 11/22/25.
+    )
+
+    # settings are parsed once from config.yaml into CFG (see scripts/_config.py)
+    MODEL_PATH = CFG.artifacts.model
+    METRICS_PATH = CFG.artifacts.metrics
+
+
+    # Using yaml to define paths
+    xtrain_path = CFG.paths.x_train
+    xtest_path = CFG.paths.x_test
+    ytrain_path = CFG.paths.y_train
+    ytest_path = CFG.paths.y_test
+
+    # Load X_train, X_test, y_train, y_test from data/cleaned (written by preprocess.py)
+    # X is the sparse .npz matrix when present; RandomForestRegressor trains on it directly
+    io_format = CFG.io_format
+    X_train = load_matrix(xtrain_path, io_format)
+    X_test = load_matrix(xtest_path, io_format)
+    # y is the float32 .npz vector written by preprocess.py (older runs: single-column table)
+    y_train = load_target(ytrain_path, io_format)
+    y_test = load_target(ytest_path, io_format)
+    # The above code snippet was generated by ChatGPT 5.1 at 8:22p on 11/22/25.
+
+    model_params = CFG.train.model_params
+    # Model selection
+    model = RandomForestRegressor(**model_params)
+
+    # Fitting model to X_train, y_train
+    model.fit(X_train, y_train)
+
+    y_pred = model.predict(X_test)
+
+    # Printing model acccuracy: Returns 94.7%
+    # print(model.score(X_test, y_test))
+
+    # Begin cited block: OpenAI. (2025, November 22). ChatGPT response to a request for regression model evaluation metrics [Large language model]. https://chat.openai.com/
+    # This cited block studies model accuracy
+    mse = mean_squared_error(y_test, y_pred)
+    rmse = np.sqrt(mse)
+    mae = mean_absolute_error(y_test, y_pred)
+    r2 = r2_score(y_test, y_pred)
+    mape = np.mean(np.abs((y_test - y_pred) / y_test)) * 100
+
+    #------------------------------------END CITED BLOCK-----------------------
+
+
+    # Cited block: OpenAI. (2025, November 22). ChatGPT (Version 5.1) [Large language model]. https://chat.openai.com
+    # Code for training a RandomForestRegressor with Weights & Biases logging, including evaluation metrics and artifact tracking. Conversation used to generate train.py script for Module 3 Project.
+
+    metrics_dict = {
+        "R2": r2,
+        "RMSE": rmse,
+        "MAE": mae,
+        "MAPE": mape
     }
-    # Config built by ChatGOT 5.1 at 9:13p on 11/22/25.
-)
-
-with open("config.yaml", "r") as f:
-    config = yaml.safe_load(f)
-
-MODEL_PATH = config["artifacts"]["model"]
-METRICS_PATH = config["artifacts"]["metrics"]
-PREPROCESSOR_PATH = config["artifacts"]["preprocessor"]
-
-
-# Using yaml to define paths
-xtrain_path = config["paths"]["X_train"]
-xtest_path = config["paths"]["X_test"]
-ytrain_path = config["paths"]["y_train"]
-ytest_path = config["paths"]["y_test"]
-
-# Load X_train, X_test, y_train, y_test from data/cleaned
-X_train = pd.read_csv(xtrain_path)
-X_test = pd.read_csv(xtest_path)
-y_train = pd.read_csv(ytrain_path).squeeze()
-y_test = pd.read_csv(ytest_path).squeeze()
-# The above code snippet was generated by ChatGPT 5.1 at 8:22p on 11/22/25.
-
-model_params = config.get("train", {}).get("model_params", {})
-# Model selection
-model = RandomForestRegressor(**model_params)
-
-# Fitting model to X_train, y_train
-model.fit(X_train, y_train)
-
-y_pred = model.predict(X_test)
-
-# Printing model acccuracy: Returns 94.7%
-# print(model.score(X_test, y_test))
-
-# Begin cited block: OpenAI. (2025, November 22). ChatGPT response to a request for regression model evaluation metrics [Large language model]. https://chat.openai.com/
-# This cited block studies model accuracy
-mse = mean_squared_error(y_test, y_pred)
-rmse = np.sqrt(mse)
-mae = mean_absolute_error(y_test, y_pred)
-r2 = r2_score(y_test, y_pred)
-mape = np.mean(np.abs((y_test - y_pred) / y_test)) * 100
-
-#------------------------------------END CITED BLOCK-----------------------
-
 
-# Cited block: OpenAI. (2025, November 22). ChatGPT (Version 5.1) [Large language model]. https://chat.openai.com
-# Code for training a RandomForestRegressor with Weights & Biases logging, including evaluation metrics and artifact tracking. Conversation used to generate train.py script for Module 3 Project.
+    run.log(metrics_dict)
 
-metrics_dict = {
-    "R2": r2,
-    "RMSE": rmse,
-    "MAE": mae,
-    "MAPE": mape
-}
+    # Saving model to artifacts
+    # keep compress=0: the server loads the model with mmap_mode="r" so the tree arrays are shared
+    # between uvicorn workers, and joblib can only memory-map uncompressed files
+    os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
+    joblib.dump(model, MODEL_PATH, compress=0)
 
-run.log(metrics_dict)
+    # Saving metrics to artifacts
+    os.makedirs(os.path.dirname(METRICS_PATH), exist_ok=True)
+    with open(METRICS_PATH, "w") as f:
+        json.dump(metrics_dict, f, indent=4)
+    # The above snippet was generated by chatGPT 5.1 at 11:31p on 11/22/25.
 
-# Saving model to artifacts
-os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
-joblib.dump(model, MODEL_PATH)
+    artifact = wandb.Artifact("random_forest_model", type="model")
+    artifact.add_file(MODEL_PATH)
+    run.log_artifact(artifact)
+    # ------------------------END CITED BLOCK-----------------------
 
-# Saving metrics to artifacts
-os.makedirs(os.path.dirname(METRICS_PATH), exist_ok=True)
-with open(METRICS_PATH, "w") as f:
-    json.dump(metrics_dict, f, indent=4)
-# The above snippet was generated by chatGPT 5.1 at 11:31p on 11/22/25.
+    artifact = wandb.Artifact("model_metrics", type="metrics")
+    artifact.add_file(METRICS_PATH)
+    run.log_artifact(artifact)
 
-artifact = wandb.Artifact("random_forest_model", type="model")
-artifact.add_file(MODEL_PATH)
-run.log_artifact(artifact)
-# ------------------------END CITED BLOCK-----------------------
+    run.finish()
 
-artifact = wandb.Artifact("model_metrics", type="metrics")
-artifact.add_file(METRICS_PATH)
-run.log_artifact(artifact)
 
-run.finish()
\ No newline at end of file
+# only train when executed (python -m scripts.train), not on import
+if __name__ == "__main__":
+    main()
@@ -6,12 +6,12 @@ echo "START: container entrypoint"
 # optional: run preprocessing in container (skip if artifacts already present)
 if [ "${RUN_ARTIFACTS:-0}" = "1" ] && [ ! -f artifacts/preprocessor.joblib ]; then
   echo "Running preprocessing to create artifacts..."
-  python scripts/preprocess.py
+  python -m scripts.preprocess
 fi
 
 if [ "${RUN_ARTIFACTS:-0}" = "1" ] && [ ! -f artifacts/model.joblib ]; then
   echo "Running training to create model..."
-  python scripts/train.py
+  python -m scripts.train
 fi
 
 # start server
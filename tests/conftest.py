@@ -0,0 +1,9 @@
+"""
+conftest.py:
+- Puts the repo root on sys.path so the tests can import the scripts and app packages
+  no matter how pytest is invoked (pytest -q or python -m pytest -q).
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
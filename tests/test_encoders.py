@@ -0,0 +1,141 @@
+"""
+test_encoders.py:
+- checks the fused transformers in scripts/encoders.py against the sklearn pipelines they replace:
+  FastCategoricalEncoder vs SimpleImputer(most_frequent) + OneHotEncoder,
+  FastNumericScaler vs SimpleImputer(median) + StandardScaler.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from scripts.encoders import FastCategoricalEncoder, FastNumericScaler
+
+
+# skewed categories (so some are rare) with missing values; the test split has categories never seen in fit
+def make_categorical(seed=0):
+    rng = np.random.default_rng(seed)
+    cats = np.array([f"c{i}" for i in range(12)], dtype=object)
+    probs = np.array([0.3, 0.2, 0.15, 0.1, 0.08, 0.06, 0.04, 0.03, 0.02, 0.01, 0.005, 0.005])
+    df = pd.DataFrame({
+        "A": rng.choice(cats, 300, p=probs),
+        "B": rng.choice(cats[:4], 300),
+    })
+    df.loc[rng.choice(300, 20, replace=False), "A"] = np.nan
+    df.loc[rng.choice(300, 10, replace=False), "B"] = np.nan
+    train, test = df.iloc[:240].copy(), df.iloc[240:].copy()
+    test.iloc[:5, 0] = "unseen_A"
+    test.iloc[5:8, 1] = "unseen_B"
+    return train, test
+
+
+def make_numeric(seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "x": rng.normal(5, 2, 200),
+        "y": rng.exponential(3, 200),
+        "const": np.full(200, 7.0),   # zero variance
+    })
+    df.loc[rng.choice(200, 15, replace=False), "x"] = np.nan
+    df.loc[rng.choice(200, 5, replace=False), "y"] = np.nan
+    return df.iloc[:150].copy(), df.iloc[150:].copy()
+
+
+def sklearn_categorical(min_frequency=None):
+    handle_unknown = "infrequent_if_exist" if min_frequency is not None else "ignore"
+    return Pipeline([
+        ("imputer", SimpleImputer(strategy="most_frequent")),
+        ("ohe", OneHotEncoder(handle_unknown=handle_unknown, min_frequency=min_frequency, sparse_output=True)),
+    ])
+
+
+def assert_same(ours, ref):
+    assert sp.issparse(ours)
+    assert ours.shape == ref.shape
+    assert np.array_equal(ours.toarray(), ref.toarray())
+
+
+# same matrix and feature names as the sklearn pipeline, for fit_transform, fit().transform and unseen categories
+@pytest.mark.parametrize("min_frequency", [None, 5, 0.05])
+def test_categorical_matches_sklearn(min_frequency):
+    train, test = make_categorical()
+    ours = FastCategoricalEncoder(min_frequency=min_frequency)
+    ref = sklearn_categorical(min_frequency)
+
+    assert_same(ours.fit_transform(train), ref.fit_transform(train))
+    assert_same(ours.transform(test), ref.transform(test))
+    assert list(ours.get_feature_names_out()) == list(ref.get_feature_names_out())
+    # fit + transform gives the same as the single-pass fit_transform
+    assert_same(FastCategoricalEncoder(min_frequency=min_frequency).fit(train).transform(train), ref.transform(train))
+
+
+# rare categories really are grouped: one infrequent column for A, nothing to group in B
+def test_categorical_min_frequency_groups_rare():
+    train, test = make_categorical()
+    enc = FastCategoricalEncoder(min_frequency=5).fit(train)
+    names = list(enc.get_feature_names_out())
+    assert "A_infrequent_sklearn" in names
+    assert "B_infrequent_sklearn" not in names
+    # unseen A values go to the infrequent column, unseen B values are all-zero rows
+    out = enc.transform(test).toarray()
+    assert out[:5, names.index("A_infrequent_sklearn")].tolist() == [1.0] * 5
+    b_cols = [i for i, n in enumerate(names) if n.startswith("B_")]
+    assert out[5:8][:, b_cols].sum() == 0
+
+
+# an all-missing column is kept as a single "<col>_missing" indicator (sklearn's imputer would drop it)
+def test_categorical_all_nan_column():
+    train, test = make_categorical()
+    train["empty"] = np.nan
+    test["empty"] = np.nan
+    enc = FastCategoricalEncoder()
+    out = enc.fit_transform(train)
+    names = list(enc.get_feature_names_out())
+    assert names[-1] == "empty_missing"
+    assert out.toarray()[:, -1].tolist() == [1.0] * len(train)
+    assert enc.transform(test).toarray()[:, -1].tolist() == [1.0] * len(test)
+    # the other columns are unaffected
+    ref = sklearn_categorical().fit(train[["A", "B"]])
+    assert_same(enc.transform(test)[:, :-1], ref.transform(test[["A", "B"]]))
+
+
+def test_categorical_dtype():
+    train, _ = make_categorical()
+    assert FastCategoricalEncoder(dtype=np.float32).fit_transform(train).dtype == np.float32
+
+
+# same output as median imputation + standard scaling, including the zero-variance column
+def test_numeric_matches_sklearn():
+    train, test = make_numeric()
+    ours = FastNumericScaler()
+    ref = Pipeline([("imputer", SimpleImputer(strategy="median")), ("scaler", StandardScaler())])
+
+    assert np.allclose(ours.fit_transform(train), ref.fit_transform(train))
+    assert np.allclose(ours.transform(test), ref.transform(test))
+    assert np.allclose(FastNumericScaler().fit(train).transform(test), ref.transform(test))
+    assert ours.transform(test).shape == (len(test), 3)
+    assert list(ours.get_feature_names_out()) == list(ref.get_feature_names_out())
+
+
+# an all-missing column becomes all zeros (like SimpleImputer(keep_empty_features=True) + StandardScaler)
+def test_numeric_all_nan_column():
+    train, test = make_numeric()
+    train["empty"] = np.nan
+    test["empty"] = np.nan
+    ours = FastNumericScaler()
+    ref = Pipeline([
+        ("imputer", SimpleImputer(strategy="median", keep_empty_features=True)),
+        ("scaler", StandardScaler()),
+    ])
+    assert np.allclose(ours.fit_transform(train), ref.fit_transform(train))
+    assert np.allclose(ours.transform(test), ref.transform(test))
+    assert not np.isnan(ours.transform(test)).any()
+
+
+def test_numeric_dtype():
+    train, test = make_numeric()
+    out = FastNumericScaler(dtype=np.float32).fit(train).transform(test)
+    assert out.dtype == np.float32
@@ -0,0 +1,34 @@
+"""
+test_io_utils.py:
+- tests of read_csv_fast in scripts/io_utils.py: requested columns missing from the file are skipped (not an error),
+  dtype hints are applied, and empty cells come back as NaN.
+"""
+import numpy as np
+
+from scripts.io_utils import read_csv_fast
+
+
+def write_csv(tmp_path):
+    path = tmp_path / "data.csv"
+    # quoted line break in a cell, empty cells in both a numeric and a string column
+    path.write_text('Aroma,Species,Notes\n7.5,Arabica,"fruity\nsweet"\n,,plain\n8.25,Robusta,\n')
+    return str(path)
+
+
+def test_missing_columns_are_skipped(tmp_path):
+    df = read_csv_fast(write_csv(tmp_path), columns=["Aroma", "Unknown", "Species"])
+    assert list(df.columns) == ["Aroma", "Species"]
+    assert len(df) == 3
+
+
+def test_dtype_hints_and_missing_values(tmp_path):
+    df = read_csv_fast(write_csv(tmp_path), columns=["Aroma", "Species"], dtype={"Aroma": "float32", "Species": str})
+    assert df["Aroma"].dtype == np.float32
+    assert np.isnan(df["Aroma"].iloc[1])
+    assert df["Species"].isna().tolist() == [False, True, False]
+
+
+def test_all_columns(tmp_path):
+    df = read_csv_fast(write_csv(tmp_path))
+    assert list(df.columns) == ["Aroma", "Species", "Notes"]
+    assert df["Notes"].iloc[0] == "fruity\nsweet"
@@ -0,0 +1,86 @@
+"""
+test_preprocess_cache.py:
+- tests of the preprocess.py run cache (compute_cache_key / is_cached / remote_version): an unchanged rerun is
+  cached, a changed setting, input file or missing output is not, and url input without a version is never cached.
+"""
+import os
+from urllib.error import URLError
+
+import pytest
+
+import scripts.preprocess as pre
+
+SETTINGS = (["Aroma", "Flavor"], ["Species"], 10, "Total.Cup.Points", 0.2, 42)
+
+
+@pytest.fixture
+def run_dir(tmp_path, monkeypatch):
+    # meta file, preprocessor artifact and one output all live in tmp_path
+    monkeypatch.setattr(pre, "META_PATH", str(tmp_path / "preprocessor.meta.json"))
+    monkeypatch.setattr(pre, "PREPROCESSOR_PATH", str(tmp_path / "preprocessor.joblib"))
+    (tmp_path / "preprocessor.joblib").write_bytes(b"")
+    (tmp_path / "X_train.npz").write_bytes(b"")
+    (tmp_path / "data.csv").write_text("Aroma,Flavor\n7.5,8.0\n")
+    return tmp_path
+
+
+# a finished run: its cache key and outputs are recorded like main() does
+def record_run(run_dir, settings=SETTINGS):
+    key = pre.compute_cache_key(settings, "", str(run_dir / "data.csv"))
+    pre.save_meta(key, [str(run_dir / "X_train.npz")])
+    return key
+
+
+def test_unchanged_rerun_is_cached(run_dir):
+    record_run(run_dir)
+    assert pre.is_cached(pre.compute_cache_key(SETTINGS, "", str(run_dir / "data.csv")))
+
+
+def test_changed_setting_is_not_cached(run_dir):
+    record_run(run_dir)
+    changed = SETTINGS[:2] + (300,) + SETTINGS[3:]
+    assert not pre.is_cached(pre.compute_cache_key(changed, "", str(run_dir / "data.csv")))
+
+
+def test_touched_input_is_not_cached(run_dir):
+    key = record_run(run_dir)
+    data = run_dir / "data.csv"
+    st = data.stat()
+    os.utime(data, (st.st_atime, st.st_mtime + 10))
+    new_key = pre.compute_cache_key(SETTINGS, "", str(data))
+    assert new_key != key
+    assert not pre.is_cached(new_key)
+
+
+def test_missing_output_is_not_cached(run_dir):
+    key = record_run(run_dir)
+    (run_dir / "X_train.npz").unlink()
+    assert not pre.is_cached(key)
+    # the preprocessor artifact is always required, even though it is not in the recorded outputs
+    (run_dir / "X_train.npz").write_bytes(b"")
+    (run_dir / "preprocessor.joblib").unlink()
+    assert not pre.is_cached(key)
+
+
+# url input is keyed on the remote version; without one (no ETag / Last-Modified, unreachable) nothing is cached
+def test_url_cache_key(run_dir, monkeypatch):
+    url = "https://example.com/data.csv"
+    monkeypatch.setattr(pre, "remote_version", lambda u: '"etag-1"')
+    key = pre.compute_cache_key(SETTINGS, url, None)
+    pre.save_meta(key, [])
+    assert pre.is_cached(pre.compute_cache_key(SETTINGS, url, None))
+
+    monkeypatch.setattr(pre, "remote_version", lambda u: '"etag-2"')
+    assert not pre.is_cached(pre.compute_cache_key(SETTINGS, url, None))
+
+    monkeypatch.setattr(pre, "remote_version", lambda u: None)
+    assert pre.compute_cache_key(SETTINGS, url, None) is None
+    assert not pre.is_cached(None)
+
+
+def test_remote_version_unreachable(monkeypatch):
+    def fail(*args, **kwargs):
+        raise URLError("unreachable")
+
+    monkeypatch.setattr(pre, "urlopen", fail)
+    assert pre.remote_version("https://example.com/data.csv") is None
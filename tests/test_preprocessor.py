@@ -7,33 +7,58 @@ OpenAI. (2025). ChatGPT (Version 5.1) [Large language model]. https://chat.opena
 Conversation with ChatGPT on November 20, 2025, used to generate some preprocessing and testing code snippets.
 """
 import os
-import pandas as pd
-import yaml
+import joblib
+import numpy as np
+import scipy.sparse as sp
 
-with open("config.yaml") as f:
-    config = yaml.safe_load(f)
+# the repo root is put on sys.path by tests/conftest.py
+from scripts._config import CFG
+# outputs are loaded exactly like train.py does: the sparse .npz when present, else the io.format table
+from scripts.io_utils import load_matrix, load_target
+
+# NaN check that works for both sparse matrices and DataFrames
+def has_nans(X):
+    if sp.issparse(X):
+        return bool(np.isnan(X.data).any())
+    return bool(X.isnull().any().any())
 
 # check artifact exists
 def test_preprocessor_exists():
     assert os.path.exists("artifacts/preprocessor.joblib")
 
-# CSVs are non-empty
+# feature matrices are non-empty
 def test_csvs_saved():
-    for p in ["data/cleaned/X_train.csv","data/cleaned/X_test.csv"]:
-        assert pd.read_csv(p).shape[0] > 0
+    for p in [CFG.paths.x_train, CFG.paths.x_test]:
+        assert load_matrix(p, CFG.io_format).shape[0] > 0
 
 # check train/test have same column count and no NaNs
 def test_no_nans_and_matching_shapes():
-    Xtr = pd.read_csv(config["paths"]["X_train"])
-    Xte = pd.read_csv(config["paths"]["X_test"])
+    Xtr = load_matrix(CFG.paths.x_train, CFG.io_format)
+    Xte = load_matrix(CFG.paths.x_test, CFG.io_format)
     assert Xtr.shape[1] == Xte.shape[1], "train/test have different number of columns"
-    assert not Xtr.isnull().any().any(), "NaNs present in X_train"
-    assert not Xte.isnull().any().any(), "NaNs present in X_test"
+    assert not has_nans(Xtr), "NaNs present in X_train"
+    assert not has_nans(Xte), "NaNs present in X_test"
+
+# one target per feature row
+def test_targets_match_rows():
+    assert len(load_target(CFG.paths.y_train, CFG.io_format)) == load_matrix(CFG.paths.x_train, CFG.io_format).shape[0]
+    assert len(load_target(CFG.paths.y_test, CFG.io_format)) == load_matrix(CFG.paths.x_test, CFG.io_format).shape[0]
+
+# the saved matrices were produced by the saved preprocessor (no stale output from an earlier run)
+def test_matrices_match_preprocessor():
+    loaded = joblib.load(CFG.artifacts.preprocessor)
+    # preprocess.py saves {"preprocessor": ..., "feature_names": [...]}; older artifacts are the bare object
+    if isinstance(loaded, dict) and "preprocessor" in loaded:
+        feature_names = loaded["feature_names"]
+    else:
+        feature_names = loaded.get_feature_names_out()
+    for p in [CFG.paths.x_train, CFG.paths.x_test]:
+        assert load_matrix(p, CFG.io_format).shape[1] == len(feature_names)
 
 # quick asserts after saving
 assert os.path.exists("artifacts/preprocessor.joblib")
-Xtr = pd.read_csv(config["paths"]["X_train"])
-Xte = pd.read_csv(config["paths"]["X_test"])
+Xtr = load_matrix(CFG.paths.x_train, CFG.io_format)
+Xte = load_matrix(CFG.paths.x_test, CFG.io_format)
 assert Xtr.shape[1] == Xte.shape[1], "train/test have different number of columns"
-assert not Xtr.isnull().any().any(), "NaNs present in X_train"
-assert not Xte.isnull().any().any(), "NaNs present in X_test"
\ No newline at end of file
+assert not has_nans(Xtr), "NaNs present in X_train"
+assert not has_nans(Xte), "NaNs present in X_test"
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""
+test_server.py:
+- tests of the /predict_named micro-batcher in app/server.py: results go back to the right request,
+  one bad request does not fail the rest of its batch, and the unbatched fallback still works.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.server as srv
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # wider batching window so the concurrent requests below really end up in shared batches
+    monkeypatch.setattr(srv, "BATCH_TIMEOUT", 0.05)
+    with TestClient(srv.app) as c:
+        yield c
+
+
+# prediction for rows computed directly, without the queue
+def expected(rows):
+    return srv._predict_with_artifacts(srv._rows_to_input(rows))
+
+
+def post(client, rows):
+    return client.post("/predict_named", json={"rows": rows})
+
+
+# distinct payloads (some with several rows) sent at once each get back their own predictions, in row order
+def test_batched_results_match_requests(client, monkeypatch):
+    batch_sizes = []
+    predict_batch = srv._predict_batch
+
+    def recording_predict_batch(batch):
+        batch_sizes.append(len(batch))
+        return predict_batch(batch)
+
+    monkeypatch.setattr(srv, "_predict_batch", recording_predict_batch)
+    payloads = [
+        [{"Aroma": 6.0 + i * 0.1, "Flavor": 8.0 - i * 0.1, "Quakers": j} for j in range(1 + i % 3)]
+        for i in range(24)
+    ]
+    with ThreadPoolExecutor(12) as ex:
+        responses = list(ex.map(lambda rows: post(client, rows), payloads))
+
+    for rows, r in zip(payloads, responses):
+        assert r.status_code == 200
+        assert r.json()["predictions"] == pytest.approx(expected(rows))
+    assert max(batch_sizes) > 1, "requests were never batched together"
+
+
+# a request that cannot be transformed gets a 500; the valid requests batched with it still succeed
+def test_bad_request_does_not_fail_batch(client):
+    payloads = [[{"Aroma": "not a number"}] if i % 4 == 0 else [{"Aroma": 5.0 + i * 0.2}] for i in range(16)]
+    with ThreadPoolExecutor(8) as ex:
+        responses = list(ex.map(lambda rows: post(client, rows), payloads))
+
+    for rows, r in zip(payloads, responses):
+        if isinstance(rows[0]["Aroma"], str):
+            assert r.status_code == 500
+        else:
+            assert r.status_code == 200
+            assert r.json()["predictions"] == pytest.approx(expected(rows))
+
+
+# malformed bodies are rejected before they reach the queue
+def test_invalid_payload_is_422(client):
+    assert client.post("/predict_named", content=b"not json").status_code == 422
+    assert post(client, [{"Aroma": [1, 2]}]).status_code == 422
+
+
+# without the batcher task (BATCH_QUEUE is None) requests are predicted directly
+def test_unbatched_fallback(client, monkeypatch):
+    monkeypatch.setattr(srv, "BATCH_QUEUE", None)
+    rows = [{"Aroma": 7.5, "Flavor": 6.0}, {"Aroma": 5.0}]
+    r = post(client, rows)
+    assert r.status_code == 200
+    assert r.json()["predictions"] == pytest.approx(expected(rows))
+    assert post(client, [{"Aroma": "not a number"}]).status_code == 500